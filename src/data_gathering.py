@@ -1,87 +1,236 @@
 import os
 import json
 import time
+import hashlib
+import random
+import threading
 from utils import setup_logging, log
 from web3 import Web3
 from web3.datastructures import AttributeDict
+# Private web3 API: the formatter web3 5.31.3 (pinned in requirements.txt) applies to eth_getBlockByNumber
+# results, used for batch replies. Check it still exists and matches get_block() when upgrading web3.
+from web3._utils.method_formatters import block_formatter
 from dune_client.client import DuneClient
 from dune_client.models import DuneError, ExecutionState
 from dune_client.query import QueryBase
 from dune_client.types import QueryParameter
 from dotenv import load_dotenv
-from multiprocessing import Pool, cpu_count
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
 import yaml
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Project root, used to resolve .env, config and query files
+base_dir = os.path.join(os.path.dirname(__file__), '..')
 
 # Load environment variables
-dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
+dotenv_path = os.path.join(base_dir, '.env')
 load_dotenv(dotenv_path, override=True)
 
+# Use the libyaml-backed loader when PyYAML was built with it
+yaml_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 # Load additional config if needed
-config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
+config_path = os.path.join(base_dir, 'config', 'config.yaml')
 with open(config_path, 'r') as file:
-    config = yaml.safe_load(file)
+    config = yaml.load(file, Loader=yaml_loader)
 
 # Load paths from config.yaml
 data_dir = config['data_storage']['data_directory']
 logs_dir = config['data_storage']['logs_directory']
 log_filename = config['data_storage']['log_filename']
+log_path = os.path.join(logs_dir, log_filename)
+pretty_json = config['data_storage'].get('pretty_json', False)
+sql_validation_cache_path = os.path.join(data_dir, '.sql_validation_cache.json')
+dune_cache_dir = os.path.join(data_dir, 'dune_cache')
+dune_cache_ttl_seconds = config.get('dune_cache_ttl_seconds', 86400)  # 0 or less disables the Dune results cache
 
 # Ensure data and logs directories exist
 os.makedirs(data_dir, exist_ok=True)
+if dune_cache_ttl_seconds > 0:
+    os.makedirs(dune_cache_dir, exist_ok=True)
 os.makedirs(logs_dir, exist_ok=True)
 
 # Load SQL queries from files
-backrun_query_path = os.path.join(os.path.dirname(__file__), '..', 'queries', 'fetch_backruns.sql')
+backrun_query_path = os.path.join(base_dir, 'queries', 'fetch_backruns.sql')
 with open(backrun_query_path, 'r') as file:
     local_backrun_query_sql = file.read()
 
-fetch_remaining_transactions_query_path = os.path.join(os.path.dirname(__file__), '..', 'queries', 'fetch_remaining_transactions.sql')
+fetch_remaining_transactions_query_path = os.path.join(base_dir, 'queries', 'fetch_remaining_transactions.sql')
 with open(fetch_remaining_transactions_query_path, 'r') as file:
     local_non_mev_query_sql = file.read()
 
 # Initialize Web3 and DuneClient outside the class
 rpc_node_url = os.getenv('RPC_NODE_URL')
 dune_api_key = os.getenv('DUNE_API_KEY')
-web3 = Web3(Web3.HTTPProvider(rpc_node_url))
+
+# Shared HTTP session so RPC calls reuse pooled keep-alive connections
+rpc_pool_size = config.get('performance_tuning', {}).get('rpc_pool_size', 32)
+rpc_session = requests.Session()
+rpc_adapter = HTTPAdapter(pool_maxsize=rpc_pool_size, max_retries=Retry(total=3, backoff_factor=0.2))
+rpc_session.mount('https://', rpc_adapter)
+rpc_session.mount('http://', rpc_adapter)
+
+rpc_provider = Web3.HTTPProvider(rpc_node_url, session=rpc_session)
+# web3's default retry middleware resends failed requests, 429s included, without waiting;
+# call_with_rate_limit_retry backs off instead, so it must be the only retry layer
+rpc_provider.middlewares = ()
+web3 = Web3(rpc_provider)
 dune_client = DuneClient(api_key=dune_api_key)
 
 # Load query ID's
 all_mev_blocker_bundle_per_block = config['all_mev_blocker_bundle_per_block']  # Updated to use config.yaml
 
+# Leaf types convert_to_dict leaves as they are, matched by exact type before the isinstance checks
+plain_json_types = frozenset((int, str, bool, float, type(None)))
+
 def convert_to_dict(obj):
     """Convert AttributeDict or bytes objects into serializable dictionaries."""
-    try:
-        if isinstance(obj, AttributeDict):
-            return {key: convert_to_dict(value) for key, value in obj.items()}
-        if isinstance(obj, list):
-            return [convert_to_dict(item) for item in obj]
-        if isinstance(obj, bytes):
-            return obj.hex()
-        return obj
-    except Exception as e:
-        log(f"Error converting to dict: {e}")
-        return str(obj)  # Fallback to string representation if any error occurs
+    # Walk nested values with an explicit stack instead of one call per node;
+    # every container pushed here is a fresh dict/list copy that is safe to fill in place
+    root = [obj]
+    stack = [root]
+    while stack:
+        container = stack.pop()
+        keys = container.keys() if isinstance(container, dict) else range(len(container))
+        for key in keys:
+            value = container[key]
+            if type(value) in plain_json_types:
+                continue
+            if isinstance(value, AttributeDict):
+                value = container[key] = dict(value)
+                stack.append(value)
+            elif isinstance(value, list):
+                value = container[key] = list(value)
+                stack.append(value)
+            elif isinstance(value, bytes):
+                container[key] = value.hex()
+    return root[0]
+
+# JSON-RPC error codes providers use to rate limit single entries of a batch: EIP-1474 "limit exceeded" and 429
+rpc_rate_limit_error_codes = frozenset((-32005, 429))
+
+class RpcRateLimitError(Exception):
+    """Raised when the RPC node answers an HTTP 200 batch with rate limit errors for its entries."""
+
+def is_rate_limit_error(error):
+    """Check whether error means the RPC node is rate limiting requests."""
+    if isinstance(error, RpcRateLimitError):
+        return True
+    response = getattr(error, 'response', None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code == 429
+
+def call_with_rate_limit_retry(func, *args, **kwargs):
+    """Call func, retrying with capped exponential backoff while the RPC node answers 429 Too Many Requests."""
+    rate_limit_handling = config.get('rate_limit_handling', {})
+    max_retries = rate_limit_handling.get('max_retries', 5)
+    delay = rate_limit_handling.get('initial_delay_seconds', 1)
+    max_delay = rate_limit_handling.get('max_delay_seconds', 30)
+    backoff_multiplier = rate_limit_handling.get('backoff_multiplier', 2)
+    jitter = rate_limit_handling.get('jitter', 0.25)
+
+    for attempt in range(max_retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except (requests.HTTPError, RpcRateLimitError) as e:
+            if not is_rate_limit_error(e) or attempt == max_retries:
+                raise
+            response = getattr(e, 'response', None)
+            # Prefer the wait the node asks for (up to max_delay); jitter keeps worker threads from retrying in lockstep
+            retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+            if retry_after.isdigit():
+                wait = min(int(retry_after), max_delay)
+            else:
+                wait = delay * random.uniform(1 - jitter, 1 + jitter)
+                delay = min(delay * backoff_multiplier, max_delay)
+            log("Rate limited by the RPC node, retrying in %.1f seconds...", wait)
+            time.sleep(wait)
 
 def fetch_block_contents(block_number):
     """Fetch the contents of a block given its number."""
-    block = web3.eth.get_block(block_number, full_transactions=True)
-    log(f"Fetched block {block_number} with {len(block['transactions'])} transactions.")
+    block = call_with_rate_limit_retry(web3.eth.get_block, block_number, full_transactions=True)
+    log("Fetched block %s with %s transactions.", block_number, len(block['transactions']))
     return block
 
+def post_rpc_batch(payload):
+    """POST a JSON-RPC batch to the RPC node and return the decoded replies."""
+    # Batches of full blocks are large, so allow more time than web3's 10 second default
+    response = rpc_session.post(rpc_node_url, json=payload, timeout=30)
+    response.raise_for_status()
+    replies = response.json()
+    # Some providers rate limit per entry with an HTTP 200, retry those like a 429 for the whole batch
+    if isinstance(replies, list):
+        for reply in replies:
+            error = reply.get('error')
+            if isinstance(error, dict) and error.get('code') in rpc_rate_limit_error_codes:
+                raise RpcRateLimitError(f"Batch entries were rate limited: {error}")
+    return replies
+
+def fetch_blocks_batch(block_numbers):
+    """Fetch several blocks with a single JSON-RPC batch request.
+
+    Returns a dict of block number to block, formatted the same way as fetch_block_contents.
+    Blocks missing from the response are left out so the caller can fetch them individually.
+    """
+    block_number_by_id = dict(enumerate(block_numbers))
+    payload = [
+        {"jsonrpc": "2.0", "id": request_id, "method": "eth_getBlockByNumber", "params": [hex(block_number), True]}
+        for request_id, block_number in block_number_by_id.items()
+    ]
+    replies = call_with_rate_limit_retry(post_rpc_batch, payload)
+    if not isinstance(replies, list):
+        raise ValueError(f"Unexpected response to batch request: {replies}")
+
+    blocks = {}
+    for reply in replies:
+        error = reply.get('error')
+        if error is not None:
+            log("Batch request for block %s failed: %s", block_number_by_id.get(reply.get('id')), error)
+            continue
+        result = reply.get('result')
+        if result is None:
+            continue
+        # Same result formatting web3 applies to eth_getBlockByNumber
+        block = AttributeDict.recursive(block_formatter(result))
+        blocks[block['number']] = block
+        log("Fetched block %s with %s transactions.", block['number'], len(block['transactions']))
+    return blocks
+
 def log_discrepancy_and_abort(message):
     """Log an error message and abort the script."""
-    log_path = os.path.join(logs_dir, log_filename)
     with open(log_path, 'a') as log_file:
         log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
     log(message)
     exit(1)
 
+def read_sql_validation_cache():
+    """Load previous SQL validation results, keyed by query ID."""
+    try:
+        with open(sql_validation_cache_path, 'r') as f:
+            validation_cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return validation_cache if isinstance(validation_cache, dict) else {}
+
 def compare_and_validate_sql(query_id, local_sql):
     """Fetch the SQL content from Dune using the query ID and compare it with the local SQL."""
     if not config.get('validate_sql', True):
         log("SQL validation is disabled. Skipping check.")
         return True
 
+    # Skip the Dune round-trip if this exact local SQL was validated recently
+    local_sql_hash = hashlib.sha256(local_sql.strip().encode()).hexdigest()
+    validation_cache = read_sql_validation_cache()
+    # A malformed entry is treated as a cache miss
+    cached = validation_cache.get(str(query_id))
+    validated_at = cached.get('validated_at') if isinstance(cached, dict) else None
+    if (isinstance(validated_at, (int, float)) and cached.get('sql_hash') == local_sql_hash
+            and time.time() - validated_at < config.get('sql_validation_ttl_seconds', 86400)):
+        log(f"Dune query SQL for query ID {query_id} was validated recently. Skipping check.")
+        return True
+
     try:
         # Fetch the query details directly from Dune's API without converting it to a DuneQuery object
         response = dune_client._get(f"/query/{query_id}")
@@ -99,6 +248,8 @@ def compare_and_validate_sql(query_id, local_sql):
             )
         else:
             log(f"Dune query SQL matches local SQL for query ID {query_id}.")
+            validation_cache[str(query_id)] = {'sql_hash': local_sql_hash, 'validated_at': time.time()}
+            write_json(sql_validation_cache_path, validation_cache)
             return True
 
     except DuneError as e:
@@ -106,8 +257,65 @@ def compare_and_validate_sql(query_id, local_sql):
 
     return False
 
-def execute_query_and_get_results(query_id, start_block=None, end_block=None):
-    """Execute the query on Dune and get the results."""
+def dune_cache_key(query_id, start_block, end_block, sql):
+    """Build the cache key for a Dune query run over a block range with the given SQL."""
+    sql_hash = hashlib.sha256(sql.strip().encode()).hexdigest()
+    return hashlib.sha256(json.dumps([query_id, start_block, end_block, sql_hash]).encode()).hexdigest()
+
+def dune_cache_get(key):
+    """Return cached Dune rows for key, or None if missing or older than dune_cache_ttl_seconds."""
+    cache_path = os.path.join(dune_cache_dir, f"{key}.json")
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # A malformed entry is treated as a cache miss
+    cached_at = cached.get('cached_at') if isinstance(cached, dict) else None
+    if not isinstance(cached_at, (int, float)) or not isinstance(cached.get('rows'), list):
+        return None
+    if time.time() - cached_at >= dune_cache_ttl_seconds:
+        return None
+    return cached['rows']
+
+def prune_dune_cache():
+    """Delete cached Dune results older than dune_cache_ttl_seconds."""
+    expires_before = time.time() - dune_cache_ttl_seconds
+    with os.scandir(dune_cache_dir) as entries:
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < expires_before:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+
+def dune_cache_put(key, rows):
+    """Store Dune rows for key, dropping expired entries so the cache directory does not grow without bound."""
+    prune_dune_cache()
+    write_json(os.path.join(dune_cache_dir, f"{key}.json"), {'cached_at': time.time(), 'rows': rows})
+
+def execute_query_and_get_results(query_id, start_block=None, end_block=None, sql=None, latest_block_number=None):
+    """Execute the query on Dune and get the results.
+
+    Results are cached on disk when the query's SQL is given and dune_cache_ttl_seconds is positive,
+    keyed on the query, its SQL and the block range.
+    They are only stored once end_block is dune_cache_min_block_age blocks behind latest_block_number.
+    """
+    # The results only depend on the query, its SQL and the block range, so reruns can reuse them
+    use_cache = sql is not None and dune_cache_ttl_seconds > 0
+    cache_key = dune_cache_key(query_id, start_block, end_block, sql) if use_cache else None
+    if cache_key is not None:
+        cached_bundles = dune_cache_get(cache_key)
+        if cached_bundles is not None:
+            log(f"Using cached results for query ID {query_id}, identified {len(cached_bundles)} results.")
+            return cached_bundles
+
+    # Dune lags the chain, so results for recent blocks may still be incomplete and must not be cached
+    cacheable = (
+        cache_key is not None and end_block is not None and latest_block_number is not None
+        and end_block <= latest_block_number - config.get('dune_cache_min_block_age', 300)
+    )
+
     try:
         # Create query parameters
         parameters = [
@@ -123,8 +331,11 @@ def execute_query_and_get_results(query_id, start_block=None, end_block=None):
         execution_id = execution_response.execution_id
         log(f"Query execution ID: {execution_id}")
 
-        # Polling interval specified in config.yaml
-        polling_interval = config.get('polling_rate_seconds', 10)  # Default to 10 seconds if not set
+        # Poll quickly at first and back off towards the maximum interval specified in config.yaml
+        min_polling_interval = config.get('polling_min_seconds', 1)
+        max_polling_interval = config.get('polling_rate_seconds', 10)  # Default to 10 seconds if not set
+        polling_interval = min_polling_interval
+        last_status = None
 
         # Wait for the query execution to complete
         while True:
@@ -136,13 +347,23 @@ def execute_query_and_get_results(query_id, start_block=None, end_block=None):
                     result = dune_client.get_execution_results(execution_id)
                     bundles = result.get_rows()
                     log(f"Identified {len(bundles)} results.")
+                    # Empty results may only mean Dune has not indexed the range yet, so they are not cached either
+                    if bundles and cacheable:
+                        dune_cache_put(cache_key, bundles)
                     return bundles
                 elif status == ExecutionState.FAILED:
                     log(f"Query {execution_id} failed.")
                     return []
                 else:
-                    log(f"Query {execution_id} is executing, waiting {polling_interval} seconds...")
-                    time.sleep(polling_interval)
+                    # Start again from the shortest interval whenever the query changes state
+                    if status != last_status:
+                        polling_interval = min_polling_interval
+                        last_status = status
+                    # Jitter keeps concurrent runs from polling in lockstep
+                    wait = polling_interval * random.uniform(1, 1.25)
+                    log("Query %s is executing, waiting %.1f seconds...", execution_id, wait)
+                    time.sleep(wait)
+                    polling_interval = min(polling_interval * 1.5, max_polling_interval)
 
             except DuneError as e:
                 log(f"Error with Dune query execution: {e}")
@@ -152,30 +373,45 @@ def execute_query_and_get_results(query_id, start_block=None, end_block=None):
         log(f"Error executing query: {e}")
         return []
 
-def get_latest_processed_block():
-    """Get the latest processed block from the data directory."""
-    files = [f for f in os.listdir(data_dir) if f.startswith("block_") and f.endswith(".json")]
-    if not files:
+def iter_processed_blocks():
+    """Yield the numbers of blocks that have both a block_<n>.json and a bundles_<n>.json in the data directory."""
+    stored = {"block_": set(), "bundles_": set()}
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not name.endswith(".json"):
+                continue
+            for prefix, numbers in stored.items():
+                if name.startswith(prefix):
+                    try:
+                        numbers.add(int(name[len(prefix):-len(".json")]))
+                    except ValueError:
+                        pass
+                    break
+    yield from stored["block_"] & stored["bundles_"]
+
+def get_latest_processed_block(processed_blocks=None):
+    """Get the latest processed block from the data directory, or from processed_blocks if already scanned."""
+    latest_block = max(iter_processed_blocks() if processed_blocks is None else processed_blocks, default=None)
+    if latest_block is None:
         log("No processed blocks found, starting from default block range.")
-        return None
-    latest_file = max(files, key=lambda f: int(f.split('_')[1].split('.')[0]))
-    latest_block = int(latest_file.split('_')[1].split('.')[0])
     return latest_block
 
-def get_mev_blocker_bundles():
+def get_mev_blocker_bundles(latest_block_number=None, processed_blocks=None):
     """Prepare and execute Dune Analytics query to get MEV Blocker bundles."""
     # Compare and validate the SQL
     if not compare_and_validate_sql(all_mev_blocker_bundle_per_block, local_backrun_query_sql):
         return None
 
-    # Get the latest block number from the blockchain
-    latest_block_number = web3.eth.block_number
+    # Get the latest block number from the blockchain, unless the caller already did
+    if latest_block_number is None:
+        latest_block_number = web3.eth.block_number
     block_delay_seconds = config.get('block_delay_seconds', 10)
 
     # Determine start_block and end_block
     start_block = config.get('start_block')
     if start_block is None or start_block <= 0:
-        latest_processed_block = get_latest_processed_block()
+        latest_processed_block = get_latest_processed_block(processed_blocks)
         start_block = latest_processed_block if latest_processed_block else latest_block_number - 100
 
     end_block = config.get('end_block')
@@ -185,39 +421,94 @@ def get_mev_blocker_bundles():
     log(f"Start block: {start_block}, End block: {end_block}")
 
     # Execute the query and get results
-    return execute_query_and_get_results(all_mev_blocker_bundle_per_block, start_block, end_block)
-
-def store_data(block, bundles):
-    """Store the block and bundles data into the data directory."""
+    return execute_query_and_get_results(
+        all_mev_blocker_bundle_per_block, start_block, end_block,
+        sql=local_backrun_query_sql, latest_block_number=latest_block_number
+    )
+
+def to_json(obj):
+    """Serialize obj to JSON, indented only if pretty_json is enabled in config.yaml."""
+    # json.dumps without indent uses the C encoder, json.dump to a file never does
+    return json.dumps(obj, indent=4 if pretty_json else None)
+
+def write_text(path, text):
+    """Write text to path atomically, so an interrupted write never leaves a truncated file behind."""
+    # Unique per process and thread, and in the same directory so os.replace stays a rename
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_json(path, obj):
+    """Write obj to path as JSON."""
+    write_text(path, to_json(obj))
+
+def store_data(block, bundles_json):
+    """Store the block and the pre-serialized bundles JSON into the data directory."""
     # Convert block to dictionary
     block_dict = convert_to_dict(block)
 
-    with open(os.path.join(data_dir, f"block_{block['number']}.json"), 'w') as f:
-        json.dump(block_dict, f, indent=4)
+    # A block only counts as stored once both files exist, so write the bundles first
+    write_text(os.path.join(data_dir, f"bundles_{block['number']}.json"), bundles_json)
+    write_json(os.path.join(data_dir, f"block_{block['number']}.json"), block_dict)
 
-    with open(os.path.join(data_dir, f"bundles_{block['number']}.json"), 'w') as f:
-        json.dump(bundles, f, indent=4)
+    log("Stored data for block %s", block['number'])
 
-    log(f"Stored data for block {block['number']}")
+def init_rpc_worker():
+    """Make the current worker thread use the shared RPC session."""
+    # web3 caches HTTP sessions per thread; creating a provider with the session registers it for this thread
+    Web3.HTTPProvider(rpc_node_url, session=rpc_session)
 
-def process_block(block_number, bundles):
+def process_block(block_number, bundles_json):
     """Process a single block: fetch, identify bundles, and store data."""
     try:
         block = fetch_block_contents(block_number)
-        # Here we use the bundles fetched previously
-        store_data(block, bundles)
+        # Here we use the bundles fetched (and serialized) previously
+        store_data(block, bundles_json)
     except Exception as e:
-        log(f"Failed to process block {block_number}: {e}")
+        log("Failed to process block %s: %s", block_number, e)
+
+def process_blocks(block_numbers, bundles_json):
+    """Process a batch of blocks: fetch them in one RPC round-trip, then store each one."""
+    try:
+        blocks = fetch_blocks_batch(block_numbers)
+    except Exception as e:
+        if is_rate_limit_error(e):
+            # Fetching each block on its own would only add load on a node that is already throttling
+            log("Batch fetch of blocks %s-%s failed, still rate limited after retrying: %s", block_numbers[0], block_numbers[-1], e)
+            return
+        log("Batch fetch of blocks %s-%s failed, fetching them individually: %s", block_numbers[0], block_numbers[-1], e)
+        blocks = {}
+
+    for block_number in block_numbers:
+        block = blocks.get(block_number)
+        if block is None:
+            process_block(block_number, bundles_json)
+            continue
+        try:
+            store_data(block, bundles_json)
+        except Exception as e:
+            log("Failed to process block %s: %s", block_number, e)
 
 if __name__ == "__main__":
     # Initialize logging with the log file from config.yaml
-    log_path = os.path.join(logs_dir, log_filename)
     setup_logging(log_path)
 
     log("Starting data gathering process...")
 
+    # Get the latest block number once, it is needed both for the query range and the blocks to process
+    latest_block_number = web3.eth.block_number
+
+    # Scan the data directory once, the stored blocks decide both the query range and the blocks to skip
+    processed_blocks = set(iter_processed_blocks())
+
     # Fetch MEV Blocker bundles
-    bundles = get_mev_blocker_bundles()
+    bundles = get_mev_blocker_bundles(latest_block_number, processed_blocks)
 
     # Option, which handles logic when 0 results are returned
     abort_on_empty_first_query = config.get('abort_on_empty_first_query', True)
@@ -230,20 +521,44 @@ if __name__ == "__main__":
             log("No bundles retrieved. Proceeding to the next query...")
 
     # Determine the number of blocks to process
-    latest_block_number = web3.eth.block_number
-    latest_processed_block = get_latest_processed_block() or latest_block_number - config.get('start_block_offset', 100)
+    latest_processed_block = get_latest_processed_block(processed_blocks) or latest_block_number - config.get('start_block_offset', 100)
 
     # Check if `num_blocks_to_process` is set to "all"
     num_blocks_to_process = config.get('num_blocks_to_process', 5)
     if num_blocks_to_process == "all":
         # Gather all blocks from the latest processed block to the latest block on the blockchain
-        block_numbers = list(range(latest_processed_block, latest_block_number + 1))
+        block_numbers = range(latest_processed_block, latest_block_number + 1)
     else:
-        # Gather a specified number of blocks (e.g., 5)
-        block_numbers = [latest_processed_block - i for i in range(num_blocks_to_process)]
-
-    # Use multiprocessing to handle multiple blocks concurrently
-    with Pool(processes=cpu_count()) as pool:
-        pool.starmap(process_block, [(block_number, bundles) for block_number in block_numbers])
+        # Gather a specified number of blocks (e.g., 5), counting back from the latest processed block
+        block_numbers = range(latest_processed_block, latest_processed_block - num_blocks_to_process, -1)
+
+    # Skip blocks whose data was already stored by a previous run, filtering lazily instead of copying the range
+    skipped_blocks = sum(1 for block_number in processed_blocks if block_number in block_numbers)
+    if skipped_blocks:
+        log("Skipping %s blocks that are already stored.", skipped_blocks)
+    pending_block_numbers = (block_number for block_number in block_numbers if block_number not in processed_blocks)
+
+    # The same bundles are stored alongside every block, so serialize them only once
+    bundles_json = to_json(bundles)
+
+    # Group blocks so each RPC round-trip fetches several of them
+    batch_size = config.get('performance_tuning', {}).get('rpc_batch_size', 10)
+    batches = iter(lambda: list(islice(pending_block_numbers, batch_size)), [])
+
+    # Block processing is I/O bound (RPC and disk), so worker threads share one connection pool
+    max_workers = config.get('performance_tuning', {}).get('max_workers', 'auto')
+    # 'auto' uses ThreadPoolExecutor's own default
+    max_workers = min(32, (os.cpu_count() or 1) + 4) if max_workers == 'auto' else int(max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=init_rpc_worker) as executor:
+        # Submit batches in a bounded window, so memory does not grow with the number of blocks to process
+        in_flight = set()
+        for batch in batches:
+            if len(in_flight) >= 2 * max_workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(executor.submit(process_blocks, batch, bundles_json))
+        for future in in_flight:
+            future.result()
 
     log("All blocks processed.")
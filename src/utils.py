@@ -28,5 +28,6 @@ def setup_logging(log_path):
     logger.addHandler(file_handler)
     logger.addHandler(console_handler)
 
-def log(message):
-    logging.info(message)
+def log(message, *args):
+    # Arguments are %-formatted by logging only if the record is emitted
+    logging.info(message, *args)